@@ -1,8 +1,13 @@
 #!/usr/bin/env python3
 
+import array
 import csv
+import functools
+import itertools
 import json
+import operator
 import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
 
 
 class ExtractTransformLoad:
@@ -15,19 +20,190 @@ class ExtractTransformLoad:
     def __init__(self):
         """
         The method initializes the following attributes:
-        row - a list into which rows with values in the form of dictionaries
-        (where the key is the name of the column, the value is the
-        corresponding value of the string or number in the row) are written
-        from the data files;
+        columns_data - a dictionary into which the values read from the data
+        files are written column by column (where the key is the name of the
+        column, the value is a list with the string or number of each row;
+        None marks a row with no value in that column; M columns without
+        missing values are stored as arrays of 64-bit integers);
+        n_rows - the number of rows read from all data files;
         columns - a set that stores the names of all columns from all data
         files;
         common_columns - a list that stores sets with column names from each
         data file.
         """
 
-        self.rows = []
+        self.columns_data = {}
+        self.n_rows = 0
         self.columns = set()
         self.common_columns = []
+        self._rows_cache = {}
+
+    def _append_rows(self, data: dict, n_rows: int):
+        """
+        The method appends the rows read from a data file to the
+        columns_data attribute. Columns absent from the file are padded
+        with None, so that all columns always have n_rows values.
+        Resets the cached sorted D- and M-columns, rows order and grouping.
+
+        :param data: dictionary with columns read from a data file (or a
+        part of it), where keys are column names, values are lists or
+        array.array of n_rows values
+        :type data: dict
+        :param n_rows: number of rows read
+        :type n_rows: int
+        """
+
+        for column in self.columns_data.keys() - data.keys():
+            self._extend_column(column, [None] * n_rows)
+        for column, values in data.items():
+            if column not in self.columns_data:
+                if column[0] == 'M' and not self.n_rows:
+                    self.columns_data[column] = array.array('q')
+                else:
+                    self.columns_data[column] = [None] * self.n_rows
+            self._extend_column(column, values)
+        self.n_rows += n_rows
+        self._reset_cache()
+
+    def _reset_cache(self):
+        """
+        The method resets the cached d_m_sorted_columns and
+        d_m_sorted_common_columns properties, and the rows order and
+        grouping of rows kept in the _rows_cache attribute.
+        Called whenever a data file is read.
+        """
+
+        self.__dict__.pop('d_m_sorted_columns', None)
+        self.__dict__.pop('d_m_sorted_common_columns', None)
+        self._rows_cache.clear()
+
+    def _extend_column(self, column: str, values):
+        """
+        The method appends values to the column in the columns_data
+        attribute. M columns are stored as arrays of 64-bit integers while
+        they have no missing values. A column that gets a missing value or a
+        number out of range is converted to a list.
+
+        :param column: column name
+        :type column: str
+        :param values: values to append
+        :type values: list or array.array
+        """
+
+        stored = self.columns_data[column]
+        if isinstance(stored, array.array):
+            size = len(stored)
+            try:
+                stored.extend(values)
+                return
+            except (TypeError, OverflowError):
+                del stored[size:]
+                stored = self.columns_data[column] = stored.tolist()
+        stored.extend(values)
+
+    def _merge(self, other: 'ExtractTransformLoad'):
+        """
+        The method appends the data read by another instance of the class
+        to the attributes of this instance.
+
+        :param other: instance of the class with read data
+        :type other: ExtractTransformLoad
+        """
+
+        self.columns.update(other.columns)
+        self.common_columns.extend(other.common_columns)
+        self._append_rows(other.columns_data, other.n_rows)
+
+    @staticmethod
+    def _read_file(method: str, path: str) -> 'ExtractTransformLoad':
+        """
+        The method reads one data file into a new instance of the class.
+        Used to read data files in separate processes.
+
+        :param method: name of the read method: read_csv, read_json or
+        read_xml
+        :type method: str
+        :param path: path to data file
+        :type path: str
+
+        :rtype: ExtractTransformLoad
+        :return: instance of the class with read data
+        """
+
+        etl = ExtractTransformLoad()
+        getattr(etl, method)(path)
+        return etl
+
+    def _column(self, column: str):
+        """
+        The method returns the values of the column from the columns_data
+        attribute, or a list of None if no data file has such a column.
+
+        :param column: column name
+        :type column: str
+
+        :rtype: list or array.array
+        :return: list or array.array with n_rows values of the column
+        """
+
+        values = self.columns_data.get(column)
+        if values is None:
+            values = [None] * self.n_rows
+        return values
+
+    @staticmethod
+    def _csv_column(rows: tuple, i: int) -> list:
+        """
+        The method returns the values of the column with index i from the
+        rows read from a .csv file. Rows that are too short get None.
+
+        :param rows: sequence of rows read by csv.reader
+        :type rows: tuple
+        :param i: index of the column in the header
+        :type i: int
+
+        :rtype: list
+        :return: list with the values of the column
+        """
+
+        try:
+            return list(map(operator.itemgetter(i), rows))
+        except IndexError:
+            return [row[i] if i < len(row) else None for row in rows]
+
+    @staticmethod
+    def _parse_int_column(values: list) -> list:
+        """
+        The method converts the values of the M column to numbers in place.
+        The whole column is converted in one pass, the values are checked
+        one by one only if the column has an incorrect value. Incorrect
+        values are replaced with None, missing values are left as None.
+
+        :param values: list with values of the M column
+        :type values: list
+
+        :rtype: list
+        :return: list of (index, value) pairs with incorrect values
+        """
+
+        try:
+            values[:] = map(int, values)
+        except (TypeError, ValueError):
+            pass
+        else:
+            return []
+
+        incorrect = []
+        for i, val in enumerate(values):
+            if val is None:
+                continue
+            try:
+                values[i] = int(val)
+            except ValueError:
+                incorrect.append((i, val))
+                values[i] = None
+
+        return incorrect
 
     def read_csv(self, path: str):
         """
@@ -40,32 +216,36 @@ class ExtractTransformLoad:
         :raises ValueError: if the value in column M is not a number
         """
 
-        with open(path) as f:
+        with open(path, newline='') as f:
             reader = csv.reader(f)
-            columns = None
-            for row in reader:
-                if not columns:
-                    columns = row
-                    self.columns.update(row)
-                    self.common_columns.append(set(row))
-                    continue
-                new_row = {}
-                for key, val in zip(columns, row):
-                    if key[0] == 'D':
-                        new_row[key] = val
-                    elif key[0] == 'M':
-                        try:
-                            value = int(val)
-                        except ValueError:
-                            print(f"Incorrect value: '{val}'\n"
-                                  f'file: {path}\n'
-                                  f'column: {key}\n'
-                                  f'row number: {reader.line_num}\n')
-                            continue
-                        else:
-                            new_row[key] = value
-
-                self.rows.append(new_row)
+            columns = next(reader, None)
+            if not columns:
+                return
+            self.columns.update(columns)
+            self.common_columns.append(set(columns))
+            positions = {key: i for i, key in enumerate(columns)}
+            d_columns = [(i, key) for key, i in positions.items()
+                         if key[0] == 'D']
+            m_columns = [(i, key) for key, i in positions.items()
+                         if key[0] == 'M']
+            self._reset_cache()
+            numbered_rows = ((reader.line_num, row) for row in reader)
+            while True:
+                batch = list(itertools.islice(numbered_rows, 256))
+                if not batch:
+                    break
+                line_nums, rows = zip(*batch)
+                data = {key: self._csv_column(rows, i)
+                        for i, key in d_columns}
+                for i, key in m_columns:
+                    values = self._csv_column(rows, i)
+                    for row_index, val in self._parse_int_column(values):
+                        print(f"Incorrect value: '{val}'\n"
+                              f'file: {path}\n'
+                              f'column: {key}\n'
+                              f'row number: {line_nums[row_index]}\n')
+                    data[key] = values
+                self._append_rows(data, len(rows))
 
     def read_json(self, path: str):
         """
@@ -79,28 +259,23 @@ class ExtractTransformLoad:
         """
 
         with open(path) as f:
-            data = json.load(f)
-            common_columns = set()
-            for field in data['fields']:
-                self.columns.update(field.keys())
-                new_row = {}
-                for key, val in field.items():
-                    common_columns.add(key)
-                    if key[0] == 'M':
-                        try:
-                            value = int(val)
-                        except ValueError:
-                            print(f"Incorrect value: '{val}'\n"
-                                  f'file: {path}\n'
-                                  f'key: {key}\n'
-                                  f'field: {field}\n')
-                            continue
-                        else:
-                            new_row[key] = value
-                    new_row[key] = val
-
-                self.rows.append(new_row)
-            self.common_columns.append(common_columns)
+            fields = json.load(f)['fields']
+
+        common_columns = dict.fromkeys(itertools.chain.from_iterable(fields))
+        self.columns.update(common_columns)
+        self.common_columns.append(set(common_columns))
+        columns_data = {}
+        for key in common_columns:
+            values = [field.get(key) for field in fields]
+            if key[0] == 'M':
+                for i, val in self._parse_int_column(values):
+                    print(f"Incorrect value: '{val}'\n"
+                          f'file: {path}\n'
+                          f'key: {key}\n'
+                          f'field: {fields[i]}\n')
+            columns_data[key] = values
+
+        self._append_rows(columns_data, len(fields))
 
     def read_xml(self, path: str):
         """
@@ -113,78 +288,108 @@ class ExtractTransformLoad:
         :raises ValueError: if the value in column M is not a number
         """
 
-        tree = ET.parse(path)
         new_row = {}
         common_columns = set()
-        for obj in tree.findall('objects/object'):
+        tags = []
+        for event, obj in ET.iterparse(path, events=('start', 'end')):
+            if event == 'start':
+                tags.append(obj.tag)
+                continue
+            tags.pop()
+            if tags[1:] != ['objects'] or obj.tag != 'object':
+                continue
             column = obj.attrib['name']
             self.columns.add(column)
             common_columns.add(column)
-            for val in obj:
-                val = val.text
-                if column[0] == 'D':
-                    new_row[column] = val
-                elif column[0] == 'M':
+            if column[0] == 'D':
+                for val in obj:
+                    new_row[column] = val.text
+            elif column[0] == 'M':
+                for val in obj:
                     try:
-                        value = int(val)
+                        new_row[column] = int(val.text)
                     except ValueError:
-                        print(f"Incorrect value: '{val}'\n"
+                        print(f"Incorrect value: '{val.text}'\n"
                               f'file: {path}\n'
                               f'object name: {column}\n')
-                        continue
-                    else:
-                        new_row[column] = value
+            obj.clear()
 
-        self.rows.append(new_row)
+        self._append_rows({key: [val] for key, val in new_row.items()}, 1)
         self.common_columns.append(common_columns)
 
-    @property
-    def d_m_sorted_columns(self):
+    @staticmethod
+    def _d_m_sorted(columns) -> tuple:
         """
-        The property implements splitting the columns attribute into D- and
-        M-columns and sorting each of the received columns.
-        Returns 2 tuples with D columns and M columns.
+        The method implements splitting the column names into D- and
+        M-columns and sorting each of the received columns by number.
+
+        :param columns: iterable with column names
+        :type columns: iterable
+
+        :rtype: tuple
+        :return: 2 tuples with D columns and M columns
         """
 
         d_columns = []
         m_columns = []
-        for column in self.columns:
+        for column in columns:
             if column[0] == 'D':
-                d_columns.append(column)
+                d_columns.append((int(column[1:]), column))
             elif column[0] == 'M':
-                m_columns.append(column)
+                m_columns.append((int(column[1:]), column))
 
-        d_columns = tuple(sorted(d_columns, key=lambda y: int(y[1:])))
-        m_columns = tuple(sorted(m_columns, key=lambda y: int(y[1:])))
+        d_columns = tuple(column for _, column in sorted(d_columns))
+        m_columns = tuple(column for _, column in sorted(m_columns))
 
         return d_columns, m_columns
 
-    @property
+    @functools.cached_property
+    def d_m_sorted_columns(self):
+        """
+        The property implements splitting the columns attribute into D- and
+        M-columns and sorting each of the received columns.
+        Returns 2 tuples with D columns and M columns.
+        The result is cached until the next data file is read.
+        """
+
+        return self._d_m_sorted(self.columns)
+
+    @functools.cached_property
     def d_m_sorted_common_columns(self):
         """
         The property implements splitting into D- and M-columns of the
         intersection of column names in the common_columns attribute and
         sorting each of the resulting columns.
         Returns 2 tuples with D columns and M columns.
+        The result is cached until the next data file is read.
         """
 
         if not self.common_columns:
             return tuple(), tuple()
 
-        d_columns = []
-        m_columns = []
+        columns_sets = sorted(self.common_columns, key=len)
+        intersection = set(columns_sets[0])
+        for columns in columns_sets[1:]:
+            if not intersection:
+                break
+            intersection.intersection_update(columns)
 
-        for column in self.common_columns[0].intersection(
-                *self.common_columns[1:]):
-            if column[0] == 'D':
-                d_columns.append(column)
-            elif column[0] == 'M':
-                m_columns.append(column)
+        return self._d_m_sorted(intersection)
 
-        d_columns = tuple(sorted(d_columns, key=lambda y: int(y[1:])))
-        m_columns = tuple(sorted(m_columns, key=lambda y: int(y[1:])))
+    def _rows_order_by_d1(self) -> list:
+        """
+        The method returns the indices of the rows sorted by column D1.
+        The result is cached until the next data file is read.
 
-        return d_columns, m_columns
+        :rtype: list
+        :return: list of row indices
+        """
+
+        if 'rows_order' not in self._rows_cache:
+            self._rows_cache['rows_order'] = sorted(
+                range(self.n_rows), key=self._column('D1').__getitem__)
+
+        return self._rows_cache['rows_order']
 
     def write_tsv_basic(self, path: str, common_columns: bool):
         """
@@ -204,7 +409,7 @@ class ExtractTransformLoad:
         :type common_columns: bool
         """
 
-        with open(path, 'w') as out_file:
+        with open(path, 'w', newline='') as out_file:
             tsv_writer = csv.writer(out_file, delimiter='\t')
             if common_columns:
                 d_columns, m_columns = self.d_m_sorted_common_columns
@@ -212,12 +417,47 @@ class ExtractTransformLoad:
                 d_columns, m_columns = self.d_m_sorted_columns
             columns = d_columns + m_columns
             tsv_writer.writerow(columns)
-            sorted_rows = sorted(self.rows, key=lambda x: x['D1'])
-            for row in sorted_rows:
-                out_row = []
-                for col in columns:
-                    out_row.append(row.get(col, '-'))
-                tsv_writer.writerow(out_row)
+            order = self._rows_order_by_d1()
+            out_columns = []
+            for col in columns:
+                values = self._column(col)
+                out_values = map(values.__getitem__, order)
+                if None in values:
+                    out_values = ('-' if val is None else val
+                                  for val in out_values)
+                out_columns.append(out_values)
+            tsv_writer.writerows(zip(*out_columns))
+
+    def _group_rows(self, d_columns: tuple) -> tuple:
+        """
+        The method groups the rows by unique combinations of values from
+        the D columns. The result is cached for the given D columns until
+        the next data file is read.
+
+        :param d_columns: sorted tuple with column names D1...Dn
+        :type d_columns: tuple
+
+        :rtype: tuple
+        :return: dictionary where keys are tuples of unique combinations of
+        values from columns D1...Dn, values are group numbers; and a list
+        with the group number of each row
+        """
+
+        cache_key = ('groups', d_columns)
+        if cache_key not in self._rows_cache:
+            d_values = [['-' if val is None else val
+                         for val in self._column(col)]
+                        for col in d_columns]
+            if d_values:
+                keys = zip(*d_values)
+            else:
+                keys = itertools.repeat((), self.n_rows)
+
+            groups = {}
+            group_ids = [groups.setdefault(key, len(groups)) for key in keys]
+            self._rows_cache[cache_key] = groups, group_ids
+
+        return self._rows_cache[cache_key]
 
     def get_data_advanced(self, d_columns: tuple, m_columns: tuple) -> dict:
         """
@@ -235,18 +475,25 @@ class ExtractTransformLoad:
         :rtype: dict
         :return: dictionary with transformed data,
         where keys are tuples of unique combinations of values from columns
-        D1...Dn, values are tuples of corresponding sums of values from
-        columns M1...Mn
+        D1...Dn in sorted order, values are tuples of corresponding sums of
+        values from columns M1...Mn
         """
 
-        data = {}
-        default_val = tuple(0 for _ in m_columns)
-        for row in self.rows:
-            key = tuple(map(lambda x: row.get(x, '-'), d_columns))
-            val = tuple(map(lambda x: row.get(x, 0), m_columns))
-            val_dict = data.setdefault(key, default_val)
-            new_val = tuple(map(lambda x: x[0] + x[1], zip(val_dict, val)))
-            data[key] = new_val
+        groups, group_ids = self._group_rows(d_columns)
+
+        sums = []
+        for col in m_columns:
+            col_sums = [0] * len(groups)
+            for group_id, val in zip(group_ids, self._column(col)):
+                if val is not None:
+                    col_sums[group_id] += val
+            sums.append(col_sums)
+
+        if sums:
+            group_sums = list(zip(*sums))
+        else:
+            group_sums = [()] * len(groups)
+        data = {key: group_sums[groups[key]] for key in sorted(groups)}
 
         return data
 
@@ -270,7 +517,7 @@ class ExtractTransformLoad:
         :type common_columns: bool
         """
 
-        with open(path, 'w') as out_file:
+        with open(path, 'w', newline='') as out_file:
             tsv_writer = csv.writer(out_file, delimiter='\t')
             if common_columns:
                 d_columns, m_columns = self.d_m_sorted_common_columns
@@ -280,17 +527,19 @@ class ExtractTransformLoad:
                 lambda v: f'{v[0]}S{v[1:]}', m_columns)))
             data = self.get_data_advanced(d_columns=d_columns,
                                           m_columns=m_columns)
-            for key in sorted(data.keys()):
-                tsv_writer.writerow(key + data[key])
+            tsv_writer.writerows(key + sums for key, sums in data.items())
 
 
 if __name__ == '__main__':
     print('Start process')
     etl = ExtractTransformLoad()
-    etl.read_csv('data/csv_data_1.csv')
-    etl.read_csv('data/csv_data_2.csv')
-    etl.read_json('data/json_data.json')
-    etl.read_xml('data/xml_data.xml')
+    methods = ('read_csv', 'read_csv', 'read_json', 'read_xml')
+    paths = ('data/csv_data_1.csv', 'data/csv_data_2.csv',
+             'data/json_data.json', 'data/xml_data.xml')
+    with ProcessPoolExecutor(max_workers=len(paths)) as executor:
+        for file_etl in executor.map(ExtractTransformLoad._read_file,
+                                     methods, paths):
+            etl._merge(file_etl)
     etl.write_tsv_basic('results/out_basic.tsv', common_columns=False)
     etl.write_tsv_advanced('results/out_advanced.tsv', common_columns=False)
     etl.write_tsv_basic('results/out_basic_union.tsv', common_columns=True)
@@ -1,7 +1,10 @@
 #!/usr/bin/env python3
 
 import unittest
+import array
+import contextlib
 import csv
+import io
 
 from etl_script import ExtractTransformLoad
 
@@ -18,14 +21,116 @@ class TestETL(unittest.TestCase):
         """
         self.assertEqual(len(self.etl.columns), 7)
 
+    def test_sorted_columns_cache(self):
+        """
+        Checking that the sorted columns are updated after reading the next
+        data file
+        """
+        self.assertEqual(self.etl.d_m_sorted_columns[1],
+                         ('M1', 'M2', 'M3', 'M4'))
+        self.etl.read_csv('data/csv_data_2.csv')
+        self.assertEqual(len(self.etl.d_m_sorted_columns[1]), 10)
+        self.assertEqual(self.etl.d_m_sorted_common_columns[1],
+                         ('M1', 'M2', 'M3', 'M4'))
+
+    def test_rows_cache(self):
+        """
+        Checking that the grouping of rows and the rows order are reused
+        until the next data file is read
+        """
+        d_columns = self.etl.d_m_sorted_columns[0]
+        groups = self.etl._group_rows(d_columns)
+        order = self.etl._rows_order_by_d1()
+        self.etl.get_data_advanced(d_columns, ('M1',))
+        self.assertIs(self.etl._group_rows(d_columns), groups)
+        self.assertIs(self.etl._rows_order_by_d1(), order)
+
+        self.etl.read_csv('data/test_data.csv')
+        new_groups = self.etl._group_rows(d_columns)
+        self.assertIsNot(new_groups, groups)
+        self.assertEqual(len(new_groups[1]), 6)
+        self.assertEqual(len(self.etl._rows_order_by_d1()), 6)
+
     def test_val_in_row(self):
         """
         Checking for a specific value in a row
         """
-        row = self.etl.rows[2]
-        val = row.get('M3')
+        val = self.etl.columns_data['M3'][2]
         self.assertEqual(val, 5)
 
+    def test_columns_aligned(self):
+        """
+        Checking that all columns have a value for each row read from files
+        with different sets of columns
+        """
+        self.etl.read_csv('data/csv_data_2.csv')
+        self.etl.read_xml('data/xml_data.xml')
+        self.assertEqual(self.etl.n_rows, 7)
+        for values in self.etl.columns_data.values():
+            self.assertEqual(len(values), self.etl.n_rows)
+        self.assertIsNone(self.etl.columns_data['M10'][0])
+
+    def test_data_advanced(self):
+        """
+        Checking the sums of values from M columns grouped by a specific
+        combination of values from D columns
+        """
+        self.etl.read_csv('data/test_data.csv')
+        data = self.etl.get_data_advanced(*self.etl.d_m_sorted_columns)
+        self.assertEqual(len(data), 3)
+        self.assertEqual(list(data), sorted(data))
+        self.assertEqual(data[('a', 'c', 'b')], (12, 8, 2, 0))
+
+    def test_parse_int_column(self):
+        """
+        Checking the conversion of M column values with incorrect and
+        missing values
+        """
+        values = ['1', 'x', None, '3']
+        incorrect = self.etl._parse_int_column(values)
+        self.assertEqual(incorrect, [(1, 'x')])
+        self.assertEqual(values, [1, None, None, 3])
+
+    def test_merge(self):
+        """
+        Checking that the data read in a separate instance and merged is
+        the same as the data read directly
+        """
+        etl = ExtractTransformLoad()
+        etl._merge(ExtractTransformLoad._read_file('read_json',
+                                                   'data/json_data.json'))
+        etl._merge(ExtractTransformLoad._read_file('read_csv',
+                                                   'data/test_data.csv'))
+        self.etl = ExtractTransformLoad()
+        self.etl.read_json('data/json_data.json')
+        self.etl.read_csv('data/test_data.csv')
+        self.assertEqual(etl.columns_data, self.etl.columns_data)
+        self.assertEqual(etl.common_columns, self.etl.common_columns)
+
+    def test_json_values(self):
+        """
+        Checking that numbers written as strings in a .json file are
+        converted and incorrect values are skipped
+        """
+        etl = ExtractTransformLoad()
+        etl.read_json('data/test_data.json')
+        self.assertEqual(etl.columns_data['M1'], array.array('q', [3, 4]))
+        self.assertEqual(etl.columns_data['M2'], [1, None])
+        data = etl.get_data_advanced(*etl.d_m_sorted_columns)
+        self.assertEqual(data[('a', 'b')], (7, 1))
+
+    def test_incorrect_value_line_number(self):
+        """
+        Checking that the error message for an incorrect value points to the
+        line in the file when a previous row has a multi-line value
+        """
+        etl = ExtractTransformLoad()
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            etl.read_csv('data/test_data_multiline.csv')
+        self.assertIn('row number: 4\n', out.getvalue())
+        self.assertEqual(etl.columns_data['M1'], [1, None])
+
     def test_val_in_out_file(self):
         """
         Checking the sum of values across all rows and along the diagonal of